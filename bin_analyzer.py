@@ -1,94 +1,108 @@
 import os
 import sys
 import json
-import math
+import mmap
+import hashlib
 import sqlite3
 import ctypes
-import pefile
+import numpy as np
 import argparse
-from ctypes import wintypes
+from itertools import islice
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+from pe_headers import VERSION_FIELDS, read_sections, parse_version_info
+from entropy_kernel import HAVE_NUMBA, HAVE_NATIVE, single_threaded
+
+if HAVE_NUMBA:
+    from entropy_kernel import shannon
+if HAVE_NATIVE:
+    from entropy_kernel import shannon_native
+
+try:
+    from tqdm import tqdm
+except ImportError:
+    tqdm = None
 
 DB_NAME = "binary_info.db"
+COMMIT_EVERY = 1000
+NUMBA_MIN_SECTION_SIZE = 1 << 20
+MIN_PE_SIZE = 64  # sizeof(IMAGE_DOS_HEADER)
+FILE_VER_GET_NEUTRAL = 0x02
 
-def calculate_entropy(data: bytes) -> float:
-    """Calculate Shannon entropy of a bytes sequence."""
+def calculate_entropy(data) -> float:
+    """Calculate Shannon entropy of a bytes-like object."""
     if not data:
         return 0.0
-    counts = [0] * 256
-    for b in data:
-        counts[b] += 1
-    entropy = 0.0
-    for count in counts:
-        if count:
-            p_x = count / len(data)
-            entropy -= p_x * math.log2(p_x)
-    return entropy
+    arr = np.frombuffer(data, dtype=np.uint8)
+    if HAVE_NATIVE:
+        return shannon_native(arr)
+    counts = np.bincount(arr, minlength=256)
+    p = counts[counts > 0] / arr.size
+    # Subtract from 0.0 so a uniform buffer gives 0.0, not -0.0
+    return 0.0 - float((p * np.log2(p)).sum())
+
+def section_entropy(data) -> float:
+    """Calculate Shannon entropy of a section's raw bytes (any buffer, copied or not)."""
+    if not len(data):
+        return 0.0
+    arr = np.frombuffer(data, np.uint8)
+    # Below this size thread dispatch costs more than the counting itself
+    if HAVE_NUMBA and arr.size >= NUMBA_MIN_SECTION_SIZE:
+        return shannon(arr)
+    return calculate_entropy(data)
 
 def get_section_entropy(filepath):
-    """Extract entropy per section from a PE binary."""
+    """
+    Extract entropy per section from a PE binary.
+    Returns (section_entropy_json, avg_entropy, text_entropy).
+    """
     try:
-        pe = pefile.PE(filepath, fast_load=True)
-        sections = []
-        entropies = []
-        for s in pe.sections:
-            name = s.Name.decode(errors="ignore").strip("\x00")
-            e = calculate_entropy(s.get_data())
-            sections.append({"name": name, "entropy": e})
-            entropies.append(e)
-        pe.close()
+        with open(filepath, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            sections = []
+            entropies = []
+            text_entropy = None
+            # Slices of the mapping are zero-copy
+            with memoryview(mm) as view:
+                for name, start, size in read_sections(mm):
+                    e = section_entropy(view[start : start + size])
+                    sections.append({"name": name, "entropy": e})
+                    entropies.append(e)
+                    if name == ".text" and text_entropy is None:
+                        text_entropy = e
         avg = sum(entropies) / len(entropies) if entropies else 0.0
-        return json.dumps(sections, ensure_ascii=False), avg
+        return json.dumps(sections, ensure_ascii=False), avg, text_entropy
     except Exception as e:
-        return json.dumps({"error": str(e)}, ensure_ascii=False), None
+        return json.dumps({"error": str(e)}, ensure_ascii=False), None, None
 
 def get_file_version_info(filepath):
     """Extract version information from a Windows PE binary using Win32 API."""
-    size = ctypes.windll.version.GetFileVersionInfoSizeW(filepath, None)
+    # FILE_VER_GET_NEUTRAL still takes the strings from the MUI file when there is one
+    # (only VS_FIXEDFILEINFO comes from the language-neutral file), so the fields match
+    # what GetFileVersionInfoW gave. The saving is parsing the buffer here instead of
+    # making one VerQueryValueW call per field.
+    size = ctypes.windll.version.GetFileVersionInfoSizeExW(FILE_VER_GET_NEUTRAL, filepath, None)
     if not size:
         return {}
 
     res = ctypes.create_string_buffer(size)
-    ctypes.windll.version.GetFileVersionInfoW(filepath, 0, size, res)
-
-    # Get translation table
-    lptr = ctypes.c_void_p()
-    lsize = wintypes.UINT()
-    r = ctypes.windll.version.VerQueryValueW(
-        res, u"\\VarFileInfo\\Translation", ctypes.byref(lptr), ctypes.byref(lsize)
-    )
-    if not r or not lsize.value:
+    if not ctypes.windll.version.GetFileVersionInfoExW(FILE_VER_GET_NEUTRAL, filepath, 0, size, res):
         return {}
 
-    lang, codepage = ctypes.cast(lptr.value, ctypes.POINTER(wintypes.WORD))[0:2]
-
-    fields = [
-        "CompanyName",
-        "FileDescription",
-        "FileVersion",
-        "InternalName",
-        "LegalCopyright",
-        "OriginalFilename",
-        "ProductName",
-        "ProductVersion",
-        "Comments",
-    ]
-
-    info = {}
-    for field in fields:
-        sub_block = f"\\StringFileInfo\\{lang:04x}{codepage:04x}\\{field}"
-        val_ptr = ctypes.c_wchar_p()
-        val_size = wintypes.UINT()
-        if ctypes.windll.version.VerQueryValueW(
-            res, sub_block, ctypes.byref(val_ptr), ctypes.byref(val_size)
-        ):
-            if val_ptr.value:
-                info[field] = val_ptr.value.strip()
-
-    return info
-
-def init_db(db_path):
-    """Create SQLite table if not exists."""
+    return parse_version_info(res.raw)
+
+def init_db(db_path, wal=True):
+    """Create SQLite table if not exists and tune the connection for bulk inserts."""
     conn = sqlite3.connect(db_path)
+    # The journal mode is stored in the database file, so switch back explicitly
+    conn.execute("PRAGMA journal_mode=WAL;" if wal else "PRAGMA journal_mode=DELETE;")
+    conn.executescript(
+        """
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-65536;
+        PRAGMA mmap_size=268435456;
+    """
+    )
     c = conn.cursor()
     c.execute(
         """
@@ -105,73 +119,270 @@ def init_db(db_path):
             product_version TEXT,
             comments TEXT,
             section_entropy_json TEXT,
-            avg_entropy REAL
+            avg_entropy REAL,
+            text_entropy REAL
+        );
+    """
+    )
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS content_hash_cache (
+            key TEXT PRIMARY KEY,
+            info_json TEXT,
+            section_entropy_json TEXT,
+            avg_entropy REAL,
+            text_entropy REAL
         );
     """
     )
+    c.execute(
+        """
+        CREATE TABLE IF NOT EXISTS files_meta (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER,
+            size INTEGER
+        );
+    """
+    )
+    # Databases from older versions lack text_entropy; add and fill it from the JSON
+    c.execute("PRAGMA table_info(binaries);")
+    if "text_entropy" not in [row[1] for row in c.fetchall()]:
+        c.execute("ALTER TABLE binaries ADD COLUMN text_entropy REAL;")
+        c.execute(
+            """
+            UPDATE binaries SET text_entropy = (
+                SELECT json_extract(j.value, '$.entropy')
+                FROM json_each(binaries.section_entropy_json) j
+                WHERE json_extract(j.value, '$.name') = '.text'
+            )
+            WHERE json_type(section_entropy_json) = 'array';
+        """
+        )
     conn.commit()
     return conn
 
 
-def insert_record(conn, path, info, section_entropy_json, avg_entropy):
-    """Insert or replace a record in the database."""
-    c = conn.cursor()
-    c.execute(
+INSERT_SQL = """
+    INSERT OR REPLACE INTO binaries (
+        path, company_name, file_description, file_version,
+        internal_name, copyright, original_filename,
+        product_name, product_version, comments,
+        section_entropy_json, avg_entropy, text_entropy
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+def create_indexes(conn):
+    """
+    Create the indexes used by the query tool. Called after the bulk insert
+    so rows don't pay for index maintenance while loading.
+    """
+    conn.executescript(
         """
-        INSERT OR REPLACE INTO binaries (
-            path, company_name, file_description, file_version,
-            internal_name, copyright, original_filename,
-            product_name, product_version, comments,
-            section_entropy_json, avg_entropy
-        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
-    """,
-        (
-            path,
-            info.get("CompanyName"),
-            info.get("FileDescription"),
-            info.get("FileVersion"),
-            info.get("InternalName"),
-            info.get("LegalCopyright"),
-            info.get("OriginalFilename"),
-            info.get("ProductName"),
-            info.get("ProductVersion"),
-            info.get("Comments"),
-            section_entropy_json,
-            avg_entropy,
-        ),
+        CREATE INDEX IF NOT EXISTS idx_avg_entropy ON binaries(avg_entropy);
+        CREATE INDEX IF NOT EXISTS idx_company ON binaries(company_name);
+        CREATE INDEX IF NOT EXISTS idx_text_entropy ON binaries(text_entropy);
+    """
     )
-    conn.commit()
 
-def process_file(filepath, conn):
+CACHE_INSERT_SQL = """
+    INSERT OR REPLACE INTO content_hash_cache (
+        key, info_json, section_entropy_json, avg_entropy, text_entropy
+    ) VALUES (?, ?, ?, ?, ?);
+"""
+
+META_INSERT_SQL = """
+    INSERT OR REPLACE INTO files_meta (path, mtime_ns, size) VALUES (?, ?, ?);
+"""
+
+def _compile_build_record():
     """
-    Process a single binary: get info, get entropy, and insert into DB.
+    Generate build_record() for the fixed schema: VERSION_FIELDS are baked in
+    as constants and looked up through a single bound info.get.
     """
-    print(f"Scanning: {filepath}")
+    gets = "".join(f"        get({field!r}),\n" for field in VERSION_FIELDS)
+    source = (
+        "def build_record(path, result):\n"
+        "    info, section_entropy_json, avg_entropy, text_entropy = result\n"
+        "    get = info.get\n"
+        "    return (\n"
+        "        path,\n"
+        f"{gets}"
+        "        section_entropy_json,\n"
+        "        avg_entropy,\n"
+        "        text_entropy,\n"
+        "    )\n"
+    )
+    namespace = {}
+    exec(compile(source, "<build_record>", "exec"), namespace)
+    build_record = namespace["build_record"]
+    build_record.__doc__ = "Build the parameter tuple for INSERT_SQL from an analyze() result."
+    return build_record
+
+build_record = _compile_build_record()
+
+def insert_record(cur, record):
+    """Insert or replace a record in the database."""
+    # Same SQL text every call, so sqlite3 reuses the prepared statement
+    cur.execute(INSERT_SQL, record)
+
+def analyze(filepath, verbose=False):
+    """
+    Analyze a single binary and return
+    (info, section_entropy_json, avg_entropy, text_entropy).
+    Returns None if the file could not be processed. Runs in worker processes,
+    so it must not touch the database.
+    """
+    if verbose:
+        print(f"Scanning: {filepath}")
     try:
         info = get_file_version_info(filepath)
-        section_entropy_json, avg_entropy = get_section_entropy(filepath)
-        insert_record(conn, filepath, info, section_entropy_json, avg_entropy)
+        section_entropy_json, avg_entropy, text_entropy = get_section_entropy(filepath)
+        return info, section_entropy_json, avg_entropy, text_entropy
     except Exception as e:
         print(f"  Error processing {filepath}: {e}")
+        return None
+
+def content_key(filepath):
+    """Identify a file by the SHA-256 of its full contents."""
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(partial(f.read, 1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def try_content_key(filepath):
+    """content_key() for worker processes; returns None if the file can't be read."""
+    try:
+        return content_key(filepath)
+    except OSError as e:
+        print(f"  Error processing {filepath}: {e}")
+        return None
 
-def scan_folder(folder_path, db_path=DB_NAME):
-    """Scan folder for binaries and store their metadata and entropy in SQLite."""
-    conn = init_db(db_path)
+def load_cache(conn):
+    """Load previously analyzed results keyed by content_key()."""
+    c = conn.cursor()
+    c.execute(
+        "SELECT key, info_json, section_entropy_json, avg_entropy, text_entropy FROM content_hash_cache;"
+    )
+    return {key: (json.loads(info), sej, avg, text) for key, info, sej, avg, text in c.fetchall()}
+
+def load_file_meta(conn):
+    """Load the (mtime_ns, size) recorded for each path by earlier scans."""
+    c = conn.cursor()
+    c.execute("SELECT path, mtime_ns, size FROM files_meta;")
+    return {path: (mtime_ns, size) for path, mtime_ns, size in c.fetchall()}
+
+def iter_binaries(folder_path, known=None):
+    """
+    Recursively yield (path, mtime_ns, size) of candidate binaries under a
+    folder. Files that are too small for a DOS header, don't start with "MZ",
+    or match their (mtime_ns, size) in known are skipped.
+    """
     extensions = (".exe", ".dll", ".cpl")
+    try:
+        entries = list(os.scandir(folder_path))
+    except OSError:
+        return
 
-    for root, _, files in os.walk(folder_path):
-        for file in files:
-            if file.lower().endswith(extensions):
-                full_path = os.path.join(root, file)
-                process_file(full_path, conn)
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from iter_binaries(entry.path, known)
+            elif entry.name.lower().endswith(extensions) and entry.is_file():
+                # DirEntry.stat() is served from the directory listing on Windows
+                st = entry.stat()
+                if st.st_size < MIN_PE_SIZE:
+                    continue
+                if known and known.get(entry.path) == (st.st_mtime_ns, st.st_size):
+                    continue
+                with open(entry.path, "rb") as f:
+                    if f.read(2) != b"MZ":
+                        continue
+                yield entry.path, st.st_mtime_ns, st.st_size
+        except OSError:
+            continue
 
+def find_binaries(folder_path, known=None):
+    """Walk a folder and return {path: (mtime_ns, size)} for all binaries found."""
+    return {path: (mtime_ns, size) for path, mtime_ns, size in iter_binaries(folder_path, known)}
+
+def iter_results(paths, cache, workers=None, verbose=False):
+    """
+    Yield (path, key, result, is_new) for every path. result is None for
+    files that could not be read or analyzed, so callers see every path.
+    Files whose content key is already in the cache, or shared with another
+    file in this run, are only analyzed once.
+    """
+    # Hashing, parsing and entropy run in worker processes; the caller stays the only DB writer
+    # Workers run one per CPU, so each one keeps Numba to a single thread
+    with ProcessPoolExecutor(max_workers=workers, initializer=single_threaded) as ex:
+        pending = {}
+        keys = ex.map(try_content_key, paths, chunksize=32)
+        for path, key in zip(paths, keys):
+            if key is None:
+                yield path, None, None, False
+            elif key in cache:
+                yield path, key, cache[key], False
+            elif key in pending:
+                pending[key][1].append(path)
+            else:
+                pending[key] = (ex.submit(analyze, path, verbose), [path])
+
+        for key, (future, group) in pending.items():
+            result = future.result()
+            if result is not None:
+                cache[key] = result
+            for i, path in enumerate(group):
+                yield path, key, result, result is not None and i == 0
+
+def scan_folder(folder_path, db_path=DB_NAME, wal=True, workers=None, verbose=False, rescan=False):
+    """
+    Scan folder for binaries and store their metadata and entropy in SQLite.
+    Files unchanged since the last scan are skipped unless rescan is set.
+    """
+    conn = init_db(db_path, wal)
+    paths = find_binaries(folder_path, None if rescan else load_file_meta(conn))
+    results = iter_results(paths, load_cache(conn), workers, verbose)
+    # Per-file console output is slow (especially on Windows), so show a progress bar instead
+    if tqdm is not None and not verbose:
+        results = tqdm(results, total=len(paths), unit="file")
+    cur = conn.cursor()
+
+    # One transaction per batch instead of a commit (and fsync) per file
+    while True:
+        batch = list(islice(results, COMMIT_EVERY))
+        if not batch:
+            break
+        batch = [item for item in batch if item[2] is not None]
+        cur.execute("BEGIN")
+        cur.executemany(INSERT_SQL, [build_record(path, result) for path, _, result, _ in batch])
+        cur.executemany(
+            CACHE_INSERT_SQL,
+            [
+                (key, json.dumps(result[0], ensure_ascii=False), *result[1:])
+                for _, key, result, is_new in batch
+                # Don't persist parse errors, so they get retried next run
+                if is_new and result[2] is not None
+            ],
+        )
+        cur.executemany(
+            META_INSERT_SQL,
+            [(path, *paths[path]) for path, _, result, _ in batch if result[2] is not None],
+        )
+        conn.commit()
+
+    create_indexes(conn)
     conn.close()
     print(f"\n✅ Scan complete. Data saved to: {os.path.abspath(db_path)}")
 
-def scan_single_file(filepath, db_path=DB_NAME):
+def scan_single_file(filepath, db_path=DB_NAME, wal=True, verbose=False):
     """Scan a single binary and store its metadata and entropy in SQLite."""
-    conn = init_db(db_path)
-    process_file(filepath, conn)
+    conn = init_db(db_path, wal)
+    result = analyze(filepath, verbose)
+    if result is not None:
+        insert_record(conn.cursor(), build_record(filepath, result))
+        conn.commit()
+    create_indexes(conn)
     conn.close()
     print(f"\n✅ Scan complete. Data saved to: {os.path.abspath(db_path)}")
 
@@ -193,6 +404,28 @@ if __name__ == "__main__":
         default=DB_NAME,
         help=f"Path to the SQLite database file (default: {DB_NAME})"
     )
+    parser.add_argument(
+        "--no-wal",
+        action="store_true",
+        help="Keep the default rollback journal instead of WAL mode (leaves no -wal/-shm files next to the database)."
+    )
+    parser.add_argument(
+        "-j", "--jobs",
+        metavar="N",
+        type=int,
+        default=None,
+        help="Number of worker processes used when scanning a directory (default: CPU count)"
+    )
+    parser.add_argument(
+        "-v", "--verbose",
+        action="store_true",
+        help="Print every file as it is scanned instead of showing a progress bar."
+    )
+    parser.add_argument(
+        "--rescan",
+        action="store_true",
+        help="Analyze every file again, including ones unchanged since the last scan of this database."
+    )
     args = parser.parse_args()
     
     path_to_scan = args.scan_path
@@ -201,11 +434,11 @@ if __name__ == "__main__":
     if os.path.isdir(path_to_scan):
         print(f"Scanning directory: {path_to_scan}")
         print(f"Saving results to: {os.path.abspath(db_path)}")
-        scan_folder(path_to_scan, db_path)
+        scan_folder(path_to_scan, db_path, not args.no_wal, args.jobs, args.verbose, args.rescan)
     elif os.path.isfile(path_to_scan):
         print(f"Scanning single file: {path_to_scan}")
         print(f"Saving results to: {os.path.abspath(db_path)}")
-        scan_single_file(path_to_scan, db_path)
+        scan_single_file(path_to_scan, db_path, not args.no_wal, args.verbose)
     else:
         print(f"Error: '{path_to_scan}' is not a valid directory or file.")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,70 @@
+import os
+import ctypes
+import numpy as np
+
+try:
+    from numba import njit, prange, get_num_threads, set_num_threads
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+if HAVE_NUMBA:
+    @njit(cache=True, parallel=True, boundscheck=False)
+    def _shannon(arr, nchunks):
+        n = arr.size
+        step = (n + nchunks - 1) // nchunks
+        # One histogram per chunk so threads never write to the same bin
+        hist = np.zeros((nchunks, 256), np.int64)
+        for c in prange(nchunks):
+            start = c * step
+            stop = min(start + step, n)
+            for i in range(start, stop):
+                hist[c, arr[i]] += 1
+
+        entropy = 0.0
+        for b in range(256):
+            count = 0
+            for c in range(nchunks):
+                count += hist[c, b]
+            if count:
+                p_x = count / n
+                entropy -= p_x * np.log2(p_x)
+        return entropy
+
+    def shannon(arr):
+        """Calculate Shannon entropy of a uint8 array with the Numba kernel."""
+        if arr.size == 0:
+            return 0.0
+        return _shannon(arr, get_num_threads())
+
+
+def single_threaded():
+    """
+    Restrict the Numba kernel to one thread. Used as the initializer of
+    worker processes, which already run one per CPU.
+    """
+    if HAVE_NUMBA:
+        set_num_threads(1)
+
+
+def _load_native():
+    """Load the compiled shannon.c library from next to this module, if built."""
+    here = os.path.dirname(os.path.abspath(__file__))
+    for name in ("shannon.dll", "libshannon.so", "libshannon.dylib"):
+        path = os.path.join(here, name)
+        if os.path.exists(path):
+            try:
+                lib = ctypes.CDLL(path)
+            except OSError:
+                continue
+            lib.shannon_u8.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+            lib.shannon_u8.restype = ctypes.c_double
+            return lib
+    return None
+
+_native = _load_native()
+HAVE_NATIVE = _native is not None
+
+def shannon_native(arr):
+    """Calculate Shannon entropy of a uint8 array with the compiled C kernel."""
+    return _native.shannon_u8(arr.ctypes.data, arr.size)
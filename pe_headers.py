@@ -0,0 +1,113 @@
+import struct
+
+SECTION_HEADER_SIZE = 40
+# The Windows loader (and pefile) round PointerToRawData down to this when FileAlignment >= 0x200
+FILE_ALIGNMENT_HARDCODED_VALUE = 0x200
+
+# StringFileInfo fields, in the order bin_analyzer stores them
+VERSION_FIELDS = (
+    "CompanyName",
+    "FileDescription",
+    "FileVersion",
+    "InternalName",
+    "LegalCopyright",
+    "OriginalFilename",
+    "ProductName",
+    "ProductVersion",
+    "Comments",
+)
+
+def read_sections(mm):
+    """
+    Parse just the PE headers needed to locate the sections.
+    Yields (name, PointerToRawData, SizeOfRawData) for every section header.
+    Like pefile, reading stops at the first all-null or truncated header.
+    """
+    if mm[:2] != b"MZ":
+        raise ValueError("DOS Header magic not found.")
+    (e_lfanew,) = struct.unpack_from("<I", mm, 0x3C)
+    if mm[e_lfanew : e_lfanew + 4] != b"PE\x00\x00":
+        raise ValueError("Invalid NT Headers signature.")
+
+    # IMAGE_FILE_HEADER follows the 4-byte signature
+    (number_of_sections,) = struct.unpack_from("<H", mm, e_lfanew + 6)
+    (size_of_optional_header,) = struct.unpack_from("<H", mm, e_lfanew + 20)
+    optional_header = e_lfanew + 24
+
+    # FileAlignment is at the same offset in PE32 and PE32+ optional headers
+    file_alignment = 0
+    if size_of_optional_header >= 40:
+        (file_alignment,) = struct.unpack_from("<I", mm, optional_header + 36)
+
+    # IMAGE_SECTION_HEADER: Name[8], VirtualSize, VirtualAddress, SizeOfRawData, PointerToRawData, ...
+    offset = optional_header + size_of_optional_header
+    for i in range(number_of_sections):
+        start = offset + i * SECTION_HEADER_SIZE
+        header = bytes(mm[start : start + SECTION_HEADER_SIZE])
+        if len(header) < SECTION_HEADER_SIZE or header == bytes(SECTION_HEADER_SIZE):
+            break
+        name, size_of_raw_data, pointer_to_raw_data = struct.unpack_from("<8s8xII", header)
+        if file_alignment >= FILE_ALIGNMENT_HARDCODED_VALUE:
+            pointer_to_raw_data -= pointer_to_raw_data % FILE_ALIGNMENT_HARDCODED_VALUE
+        yield name.decode(errors="ignore").strip("\x00"), pointer_to_raw_data, size_of_raw_data
+
+def _align4(offset):
+    return (offset + 3) & ~3
+
+def _iter_version_nodes(buf, offset, end):
+    """
+    Walk sibling nodes of a VS_VERSIONINFO tree in buf[offset:end].
+    Yields (key, value_offset, value_size, children_offset, node_end) per node.
+    """
+    while offset + 6 <= end:
+        length, value_length, value_type = struct.unpack_from("<HHH", buf, offset)
+        if length < 6:
+            break
+        node_end = min(offset + length, end)
+        key_end = offset + 6
+        while key_end + 2 <= node_end and buf[key_end : key_end + 2] != b"\x00\x00":
+            key_end += 2
+        key = buf[offset + 6 : key_end].decode("utf-16-le", errors="ignore")
+        value_offset = _align4(key_end + 2)
+        # Text values are measured in WCHARs, binary values in bytes
+        value_size = value_length * 2 if value_type == 1 else value_length
+        yield key, value_offset, value_size, _align4(value_offset + value_size), node_end
+        offset = _align4(node_end)
+
+def parse_version_info(buf):
+    """
+    Extract VERSION_FIELDS from a raw VS_VERSIONINFO resource, using the
+    string table of the first language/codepage in the translation table.
+    """
+    root = next(_iter_version_nodes(buf, 0, len(buf)), None)
+    if root is None or root[0] != "VS_VERSION_INFO":
+        return {}
+
+    translation = None
+    string_tables = {}
+    for key, _, _, children, node_end in _iter_version_nodes(buf, root[3], root[4]):
+        if key == "VarFileInfo":
+            for var_key, value_offset, value_size, _, var_end in _iter_version_nodes(buf, children, node_end):
+                if var_key != "Translation" or translation is not None:
+                    continue
+                # The value can run past the end of a truncated buffer
+                if value_size >= 4 and value_offset + 4 <= var_end:
+                    translation = struct.unpack_from("<HH", buf, value_offset)
+        elif key == "StringFileInfo":
+            for table_key, _, _, table_children, table_end in _iter_version_nodes(buf, children, node_end):
+                strings = string_tables.setdefault(table_key.lower(), {})
+                for name, value_offset, _, _, string_end in _iter_version_nodes(buf, table_children, table_end):
+                    value = buf[value_offset:string_end].decode("utf-16-le", errors="ignore")
+                    strings[name] = value.split("\x00", 1)[0]
+
+    if translation is None:
+        return {}
+
+    lang, codepage = translation
+    strings = string_tables.get(f"{lang:04x}{codepage:04x}", {})
+    info = {}
+    for field in VERSION_FIELDS:
+        if strings.get(field):
+            info[field] = strings[field].strip()
+
+    return info
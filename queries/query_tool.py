@@ -20,15 +20,13 @@ def print_results(results, headers):
     print(f"\n  --- Found {len(results)} matching files ---")
     print(f"  {headers}")
     print("  " + "-" * 70)
-    
-    for row in results:
-        formatted_row = []
-        for item in row:
-            if isinstance(item, float):
-                formatted_row.append(f"{item:.4f}")
-            else:
-                formatted_row.append(str(item))
-        print(f"  {tuple(formatted_row)}")
+
+    # Build the whole table first and write it in one call instead of a print per row
+    lines = [
+        f"  {tuple(f'{item:.4f}' if isinstance(item, float) else str(item) for item in row)}\n"
+        for row in results
+    ]
+    sys.stdout.write("".join(lines))
 
 def query_high_entropy(conn, threshold=7.5):
     """
@@ -70,22 +68,13 @@ def query_high_entropy_text_section(conn, threshold=7.0):
     """
     print(f"[*] Querying for files with .text section entropy > {threshold}...")
     c = conn.cursor()
-    
-    # This query uses the json_each and json_extract functions in SQLite
-    # Make sure your SQLite version isn't too old.
+
+    # text_entropy is filled in at scan time and indexed, so no JSON parsing is needed here
     query = """
-        SELECT
-            b.path,
-            json_extract(j.value, '$.entropy') AS text_entropy,
-            b.product_name
-        FROM
-            binaries b,
-            json_each(b.section_entropy_json) j
-        WHERE
-            json_extract(j.value, '$.name') = '.text'
-            AND json_extract(j.value, '$.entropy') > ?
-        ORDER BY
-            text_entropy DESC;
+        SELECT path, text_entropy, product_name
+        FROM binaries
+        WHERE text_entropy > ?
+        ORDER BY text_entropy DESC;
     """
     try:
         c.execute(query, (threshold,))
@@ -93,8 +82,8 @@ def query_high_entropy_text_section(conn, threshold=7.0):
         print_results(results, headers="('Path', '.text Entropy', 'Product')")
     except sqlite3.OperationalError as e:
         print(f"\n  [!] SQL ERROR: {e}")
-        print("  [!] This query failed. Your version of SQLite might be too old")
-        print("  [!] or it lacks the JSON1 extension (required for this query).")
+        print("  [!] This query failed. The database was probably created by an older")
+        print("  [!] version of bin_analyzer.py; re-run the scan to add the text_entropy column.")
 
 
 def main():
@@ -3,17 +3,15 @@
 -- have mid-range entropy. High entropy (> 7.0) means
 -- the code itself is packed or encrypted (like with UPX).
 --
--- Requires SQLite with the JSON1 extension enabled.
+-- text_entropy is stored (and indexed) at scan time.
 
 SELECT
-    b.path,
-    json_extract(j.value, '$.entropy') AS text_entropy,
-    b.product_name
+    path,
+    text_entropy,
+    product_name
 FROM
-    binaries b,
-    json_each(b.section_entropy_json) j
+    binaries
 WHERE
-    json_extract(j.value, '$.name') = '.text'
-    AND json_extract(j.value, '$.entropy') > 7.0
+    text_entropy > 7.0
 ORDER BY
     text_entropy DESC;
\ No newline at end of file
@@ -0,0 +1,150 @@
+/*
+ * Native Shannon entropy for byte buffers, loaded from entropy_kernel.py via ctypes.
+ *
+ * Build:
+ *   Linux:   gcc -O3 -shared -fPIC -o libshannon.so shannon.c -lm
+ *   Windows: gcc -O3 -shared -o shannon.dll shannon.c
+ */
+#include <stddef.h>
+#include <stdint.h>
+#include <math.h>
+
+#if defined(_WIN32)
+#define SHANNON_EXPORT __declspec(dllexport)
+#else
+#define SHANNON_EXPORT
+#endif
+
+#if (defined(__GNUC__) || defined(__clang__)) && (defined(__x86_64__) || defined(__i386__))
+#define SHANNON_HAVE_AVX2 1
+#include <immintrin.h>
+#endif
+
+static void histogram_u8(const uint8_t *p, size_t n, uint64_t counts[256])
+{
+    /*
+     * Four shadow histograms: consecutive increments of the same bin would
+     * otherwise serialize on the load-add-store of a single counter.
+     */
+    uint32_t h0[256] = {0}, h1[256] = {0}, h2[256] = {0}, h3[256] = {0};
+    size_t i = 0;
+    int b;
+
+    for (; i + 4 <= n; i += 4) {
+        h0[p[i]]++;
+        h1[p[i + 1]]++;
+        h2[p[i + 2]]++;
+        h3[p[i + 3]]++;
+    }
+    for (; i < n; i++)
+        h0[p[i]]++;
+
+    for (b = 0; b < 256; b++)
+        counts[b] = (uint64_t)h0[b] + h1[b] + h2[b] + h3[b];
+}
+
+#ifdef SHANNON_HAVE_AVX2
+/*
+ * log2 of four positive doubles, after the Cephes log rational approximation:
+ * split x into m * 2^e with m in [sqrt(0.5), sqrt(2)) and evaluate ln(m).
+ */
+__attribute__((target("avx2,fma")))
+static __m256d log2_pd(__m256d x)
+{
+    const __m256d one = _mm256_set1_pd(1.0);
+    /* 2^52: OR-ing a small integer into its mantissa and subtracting converts it exactly */
+    const __m256d two52 = _mm256_set1_pd(4503599627370496.0);
+    __m256i xi = _mm256_castpd_si256(x);
+    __m256i ei = _mm256_srli_epi64(xi, 52);
+    __m256d e = _mm256_sub_pd(_mm256_castsi256_pd(_mm256_or_si256(ei, _mm256_castpd_si256(two52))), two52);
+    __m256d m, mask, z, p, q, y;
+
+    e = _mm256_sub_pd(e, _mm256_set1_pd(1022.0));
+    xi = _mm256_and_si256(xi, _mm256_set1_epi64x(0x000fffffffffffffLL));
+    xi = _mm256_or_si256(xi, _mm256_castpd_si256(_mm256_set1_pd(0.5)));
+    m = _mm256_castsi256_pd(xi);
+
+    mask = _mm256_cmp_pd(m, _mm256_set1_pd(0.70710678118654752440), _CMP_LT_OQ);
+    e = _mm256_sub_pd(e, _mm256_and_pd(one, mask));
+    m = _mm256_add_pd(_mm256_sub_pd(m, one), _mm256_and_pd(m, mask));
+
+    z = _mm256_mul_pd(m, m);
+    p = _mm256_set1_pd(1.01875663804580931796E-4);
+    p = _mm256_fmadd_pd(p, m, _mm256_set1_pd(4.97494994976747001425E-1));
+    p = _mm256_fmadd_pd(p, m, _mm256_set1_pd(4.70579119878881725854E0));
+    p = _mm256_fmadd_pd(p, m, _mm256_set1_pd(1.44989225341610930846E1));
+    p = _mm256_fmadd_pd(p, m, _mm256_set1_pd(1.79368678507819816313E1));
+    p = _mm256_fmadd_pd(p, m, _mm256_set1_pd(7.70838733755885391666E0));
+    q = _mm256_add_pd(m, _mm256_set1_pd(1.12873587189167450590E1));
+    q = _mm256_fmadd_pd(q, m, _mm256_set1_pd(4.52279145837532221105E1));
+    q = _mm256_fmadd_pd(q, m, _mm256_set1_pd(8.29875266912776603211E1));
+    q = _mm256_fmadd_pd(q, m, _mm256_set1_pd(7.11544750618563894466E1));
+    q = _mm256_fmadd_pd(q, m, _mm256_set1_pd(2.31251620126765340583E1));
+    y = _mm256_mul_pd(m, _mm256_div_pd(_mm256_mul_pd(z, p), q));
+    y = _mm256_fnmadd_pd(_mm256_set1_pd(0.5), z, y);
+
+    /* log2(x) = ln(m) * log2(e) + e */
+    return _mm256_fmadd_pd(_mm256_add_pd(m, y), _mm256_set1_pd(1.44269504088896340736), e);
+}
+
+__attribute__((target("avx2,fma")))
+static double entropy_avx2(const uint64_t counts[256], size_t n)
+{
+    int32_t c32[256];
+    const __m256d zero = _mm256_setzero_pd();
+    const __m256d one = _mm256_set1_pd(1.0);
+    const __m256d nd = _mm256_set1_pd((double)n);
+    __m256d acc = zero;
+    __m128d sum;
+    int b;
+
+    for (b = 0; b < 256; b++)
+        c32[b] = (int32_t)counts[b];
+
+    for (b = 0; b < 256; b += 4) {
+        __m128i c = _mm_loadu_si128((const __m128i *)(c32 + b));
+        /* Divide rather than multiply by 1/n so a bin holding all n bytes gives exactly 1 */
+        __m256d p = _mm256_div_pd(_mm256_cvtepi32_pd(c), nd);
+        __m256d nz = _mm256_cmp_pd(p, zero, _CMP_GT_OQ);
+        /* Empty bins take log2(1) = 0 so they add nothing to the sum */
+        __m256d l = log2_pd(_mm256_blendv_pd(one, p, nz));
+        acc = _mm256_fnmadd_pd(p, l, acc);
+    }
+
+    sum = _mm_add_pd(_mm256_castpd256_pd128(acc), _mm256_extractf128_pd(acc, 1));
+    sum = _mm_add_sd(sum, _mm_unpackhi_pd(sum, sum));
+    return _mm_cvtsd_f64(sum);
+}
+
+static int use_avx2(void)
+{
+    static int supported = -1;
+    if (supported < 0)
+        supported = __builtin_cpu_supports("avx2") && __builtin_cpu_supports("fma");
+    return supported;
+}
+#endif
+
+SHANNON_EXPORT double shannon_u8(const uint8_t *p, size_t n)
+{
+    uint64_t counts[256];
+    double entropy = 0.0;
+    int b;
+
+    if (n == 0)
+        return 0.0;
+
+    histogram_u8(p, n, counts);
+#ifdef SHANNON_HAVE_AVX2
+    /* Counts are converted as signed 32-bit lanes */
+    if (n <= INT32_MAX && use_avx2())
+        return entropy_avx2(counts, n);
+#endif
+    for (b = 0; b < 256; b++) {
+        if (counts[b]) {
+            double p_x = (double)counts[b] / (double)n;
+            entropy -= p_x * log2(p_x);
+        }
+    }
+    return entropy;
+}
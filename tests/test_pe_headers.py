@@ -0,0 +1,55 @@
+import struct
+import unittest
+
+from pe_headers import read_sections
+
+E_LFANEW = 0x40
+OPTIONAL_HEADER_SIZE = 0xF0
+
+def build_pe(sections, number_of_sections=None, file_alignment=0x200, pad_to=0x1000):
+    """Build a minimal PE image with the given (name, PointerToRawData, SizeOfRawData) sections."""
+    if number_of_sections is None:
+        number_of_sections = len(sections)
+    data = bytearray(b"MZ" + bytes(E_LFANEW - 2))
+    struct.pack_into("<I", data, 0x3C, E_LFANEW)
+    data += b"PE\x00\x00"
+    data += struct.pack("<HHIIIHH", 0x8664, number_of_sections, 0, 0, 0, OPTIONAL_HEADER_SIZE, 0x22)
+    optional = bytearray(OPTIONAL_HEADER_SIZE)
+    struct.pack_into("<H", optional, 0, 0x20B)
+    struct.pack_into("<I", optional, 36, file_alignment)
+    data += optional
+    for name, pointer, size in sections:
+        data += struct.pack("<8sIIIIIIHHI", name, size, 0x1000, size, pointer, 0, 0, 0, 0, 0)
+    if len(data) < pad_to:
+        data += bytes(pad_to - len(data))
+    return bytes(data)
+
+class ReadSectionsTest(unittest.TestCase):
+    def test_reads_section_table(self):
+        pe = build_pe([(b".text", 0x400, 0x200), (b".data", 0x600, 0x200)])
+        self.assertEqual(list(read_sections(pe)), [(".text", 0x400, 0x200), (".data", 0x600, 0x200)])
+
+    def test_stops_at_all_null_header(self):
+        # NumberOfSections claims more headers than the table holds; the rest is zero padding
+        pe = build_pe([(b".text", 0x400, 0x200), (b".data", 0x600, 0x200)], number_of_sections=5)
+        self.assertEqual([name for name, _, _ in read_sections(pe)], [".text", ".data"])
+
+    def test_keeps_sections_before_truncated_header(self):
+        pe = build_pe([(b".text", 0x400, 0x200), (b".data", 0x600, 0x200)], pad_to=0)
+        truncated = pe[: len(pe) - 20]
+        self.assertEqual(list(read_sections(truncated)), [(".text", 0x400, 0x200)])
+
+    def test_rounds_pointer_down_to_0x200(self):
+        pe = build_pe([(b".text", 0x401, 0x200)])
+        self.assertEqual(list(read_sections(pe)), [(".text", 0x400, 0x200)])
+
+    def test_small_file_alignment_keeps_pointer(self):
+        pe = build_pe([(b".text", 0x401, 0x200)], file_alignment=0x20)
+        self.assertEqual(list(read_sections(pe)), [(".text", 0x401, 0x200)])
+
+    def test_rejects_non_pe(self):
+        with self.assertRaises(ValueError):
+            list(read_sections(b"\x00" * 0x100))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import struct
+import unittest
+
+from pe_headers import parse_version_info
+
+def _pad4(data):
+    data += bytes(-len(data) % 4)
+
+def node(key, value=b"", children=(), value_type=1, value_length=None):
+    """Build one VS_VERSIONINFO-style node (wLength, wValueLength, wType, szKey, Value, Children)."""
+    if value_length is None:
+        value_length = len(value) // 2 if value_type == 1 else len(value)
+    data = bytearray(6) + (key + "\x00").encode("utf-16-le")
+    _pad4(data)
+    data += value
+    for child in children:
+        _pad4(data)
+        data += child
+    struct.pack_into("<HHH", data, 0, len(data), value_length, value_type)
+    return bytes(data)
+
+def string(name, text, value_type=1):
+    value = (text + "\x00").encode("utf-16-le")
+    return node(name, value, value_type=value_type)
+
+def string_file_info(table_key, strings):
+    return node("StringFileInfo", children=[node(table_key, children=strings)])
+
+def var_file_info(lang, codepage):
+    return node("VarFileInfo", children=[node("Translation", struct.pack("<HH", lang, codepage), value_type=0)])
+
+def version_info(*children):
+    fixed = struct.pack("<13I", 0xFEEF04BD, *([0] * 12))
+    return node("VS_VERSION_INFO", fixed, children, value_type=0)
+
+STRINGS = [
+    string("CompanyName", "Example Corp"),
+    string("FileDescription", " Example tool "),
+    string("FileVersion", "1.2.3.4"),
+    string("Comments", ""),
+    string("PrivateBuild", "ignored"),
+]
+
+class ParseVersionInfoTest(unittest.TestCase):
+    def test_reads_string_table(self):
+        buf = version_info(string_file_info("040904B0", STRINGS), var_file_info(0x0409, 0x04B0))
+        self.assertEqual(
+            parse_version_info(buf),
+            {"CompanyName": "Example Corp", "FileDescription": "Example tool", "FileVersion": "1.2.3.4"},
+        )
+
+    def test_var_file_info_before_string_file_info(self):
+        buf = version_info(var_file_info(0x0409, 0x04B0), string_file_info("040904b0", STRINGS))
+        self.assertEqual(parse_version_info(buf)["CompanyName"], "Example Corp")
+
+    def test_translation_without_matching_table(self):
+        buf = version_info(string_file_info("080904B0", STRINGS), var_file_info(0x0409, 0x04B0))
+        self.assertEqual(parse_version_info(buf), {})
+
+    def test_truncated_buffer(self):
+        buf = version_info(string_file_info("040904B0", STRINGS), var_file_info(0x0409, 0x04B0))
+        for size in range(len(buf)):
+            parse_version_info(buf[:size])
+        # Cut inside the Translation value: the strings are there but no table is selected
+        self.assertEqual(parse_version_info(buf[:-2]), {})
+
+    def test_binary_typed_string_nodes(self):
+        # Some resource compilers write string values with wType 0 and wValueLength in bytes
+        strings = [string("CompanyName", "Example Corp", value_type=0), string("ProductName", "Example", value_type=0)]
+        buf = version_info(string_file_info("040904B0", strings), var_file_info(0x0409, 0x04B0))
+        self.assertEqual(parse_version_info(buf), {"CompanyName": "Example Corp", "ProductName": "Example"})
+
+    def test_not_version_info(self):
+        self.assertEqual(parse_version_info(node("Something", b"\x00" * 8, value_type=0)), {})
+        self.assertEqual(parse_version_info(b""), {})
+
+if __name__ == "__main__":
+    unittest.main()